@@ -0,0 +1,194 @@
+"""
+Shared test-case loading for the conversation_to_md test harness.
+
+Test cases live in test_cases.txtar as pairs of .json and .md files.
+The loader here parses the txtar once per session (with an on-disk
+pickle cache across sessions) and feeds the parametrized test families
+in test_conversation_to_md.py via pytest_generate_tests.
+"""
+
+import functools
+import json
+import pickle
+import re
+import sys
+import pytest
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+TXTAR_PATH = Path(__file__).parent / "test_cases.txtar"
+
+# On-disk cache of the parsed txtar, invalidated by mtime. Bump the
+# version whenever the shape load_test_cases produces changes.
+CACHE_PATH = TXTAR_PATH.with_name(TXTAR_PATH.name + ".pkl")
+CACHE_VERSION = 5
+
+
+# A txtar header line; splitting on it yields [preamble, name, body, ...].
+_TXTAR_HDR_RE = re.compile(rb'(?m)^-- (.+?) --$\n?')
+# Trailing blank and comment lines of a body, stripped like the old
+# line loop's pop() pass.
+_TXTAR_TRAIL_RE = re.compile(rb'(?m)(?:^(?:#[^\n]*)?\n)+\Z')
+
+
+def parse_txtar(content: bytes) -> dict[str, str]:
+    """
+    Parse txtar format into a dict of filename -> content.
+
+    Format:
+        -- filename --
+        content
+        -- another_file --
+        more content
+
+    Tokenization happens in two compiled-regex passes (one split, one
+    trailing-strip per body) instead of a Python loop over every line.
+    Operating on raw bytes defers UTF-8 decoding to the name and body
+    slices that actually end up in the result.
+    """
+    parts = _TXTAR_HDR_RE.split(content)
+    files = {}
+    # parts[0] is the preamble before the first header (comments only)
+    # and is ignored, matching the old loop; names and bodies alternate
+    # after it.
+    for name, body in zip(parts[1::2], parts[2::2]):
+        # The appended newline lets the trail regex also catch a final
+        # comment line that lacks its own newline.
+        body = _TXTAR_TRAIL_RE.sub(b'', body + b'\n').rstrip(b'\n')
+        # No strip: txtar names aren't whitespace-padded, and the header
+        # regex already excludes the surrounding marker spaces.
+        files[name.decode()] = body.decode()
+    return files
+
+
+# Categories whose expected-output (.md) side holds JSON rather than
+# markdown; their expected values are pre-parsed like the inputs.
+_JSON_EXPECTED_CATEGORIES = {'get_text', 'extract_parts'}
+
+# A case key of the form "category/test_name.ext"; one anchored match
+# replaces the rsplit + two endswith probes per txtar entry.
+_CASE_KEY_RE = re.compile(r'(?P<cat>.+)/(?P<name>[^/]*)\.(?P<ext>json|md)\Z')
+
+
+def load_test_cases() -> dict[str, tuple[tuple[str, Any, Any], ...]]:
+    """
+    Load and group test cases by category.
+
+    Returns dict of category -> [(test_name, parsed_input, expected), ...]
+    where parsed_input is the decoded JSON input and expected is the
+    rstripped markdown string, or a decoded object for categories whose
+    expected side is JSON. Decoding once here means each test run
+    (including --lf reruns) skips the per-case parse.
+
+    The parsed result is pickled next to the txtar and reused on later
+    runs while the txtar is unchanged, so collection skips the parse.
+    """
+    txtar_mtime = TXTAR_PATH.stat().st_mtime_ns
+    try:
+        if CACHE_PATH.stat().st_mtime_ns >= txtar_mtime:
+            with open(CACHE_PATH, 'rb') as f:
+                version, cached = pickle.load(f)
+            if version == CACHE_VERSION:
+                return cached
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass  # Missing or stale/corrupt cache; fall through to a full parse
+
+    content = TXTAR_PATH.read_bytes()
+    files = parse_txtar(content)
+
+    # Group by category and test name; defaultdict keeps the inner loop
+    # to a single subscript instead of membership-check-then-insert.
+    cases_by_category: dict[str, dict[str, dict[str, str]]] = defaultdict(
+        lambda: defaultdict(dict)
+    )
+
+    for filepath, file_content in files.items():
+        m = _CASE_KEY_RE.match(filepath)
+        if m is None:
+            continue
+        # Interning dedupes the repeated category/name strings and lets
+        # later dict lookups compare by pointer instead of memcmp.
+        category = sys.intern(m['cat'])
+        test_name = sys.intern(m['name'])
+
+        cases_by_category[category][test_name][m['ext']] = file_content
+
+    # Convert to tuples of tuples: immutable, one allocation each, and
+    # handed straight to parametrize without defensive copies.
+    result = {}
+    for category, tests in cases_by_category.items():
+        cases = []
+        json_expected = category in _JSON_EXPECTED_CATEGORIES
+        for test_name, contents in sorted(tests.items()):
+            if 'json' in contents and 'md' in contents:
+                expected = contents['md']
+                if json_expected:
+                    # _loads maps "null" to None, covering the cases
+                    # that expect extract_message_parts to bail out.
+                    expected = _loads(expected.strip())
+                    if category == 'get_text':
+                        # Stored as a tuple so the test compares against
+                        # get_text_content's output without building a
+                        # dict per call.
+                        expected = (expected['text'], expected['thinking'],
+                                    expected['tools'])
+                else:
+                    # Tests compare with trailing newlines normalized;
+                    # doing the rstrip once here instead of per run.
+                    expected = expected.rstrip('\n')
+                cases.append((
+                    test_name,
+                    _loads(contents['json'].strip()),
+                    expected
+                ))
+        result[category] = tuple(cases)
+
+    try:
+        with open(CACHE_PATH, 'wb') as f:
+            pickle.dump((CACHE_VERSION, result), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # Read-only checkout; caching is best-effort
+
+    return result
+
+
+# Memoized accessor so the txtar is parsed only when a test that needs
+# it is actually collected, not at module import.
+_cached_test_cases = functools.lru_cache(maxsize=1)(load_test_cases)
+
+
+@pytest.fixture(scope="session")
+def test_cases() -> dict[str, tuple[tuple[str, Any, Any], ...]]:
+    """Session-scoped view of the loaded test cases."""
+    return _cached_test_cases()
+
+
+# test function name -> (argnames, txtar category) for parametrization.
+_PARAM_SPECS = {
+    'test_format_merged_messages': ('test_name,json_input,expected_md', 'format_merged'),
+    'test_build_conversation_md': ('test_name,json_input,expected_md', 'build_conv'),
+    'test_get_text_content': ('test_name,json_input,expected', 'get_text'),
+    'test_extract_message_parts': ('test_name,json_input,expected', 'extract_parts'),
+}
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize the txtar-driven tests at collection time.
+
+    Loading happens inside the hook, so running an unrelated subset
+    (e.g. pytest -k txtar) never pays for the parse.
+    """
+    spec = _PARAM_SPECS.get(metafunc.function.__name__)
+    if spec is None:
+        return
+    argnames, category = spec
+    cases = _cached_test_cases().get(category, ())
+    metafunc.parametrize(argnames, cases, ids=[name for name, _, _ in cases])
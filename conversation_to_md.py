@@ -4,6 +4,9 @@ Convert Claude Code conversation JSONL files to readable Markdown.
 Groups main sessions with their sub-agents, indenting agent content.
 """
 
+import concurrent.futures
+import functools
+import io
 import json
 import os
 import re
@@ -11,128 +14,284 @@ import sys
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
+from itertools import repeat
+from typing import Iterator
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
-def parse_jsonl(filepath: Path) -> list[dict]:
-    """Parse a JSONL file, returning list of message objects."""
+# Cleanup pattern applied to message text, compiled once at import.
+# ide_selection is the only tag that leaves a placeholder behind, so it
+# gets the capturing group; the other two are simply removed.
+_CLEAN_RE = re.compile(
+    r'(<ide_selection>.*?</ide_selection>)'
+    r'|<ide_opened_file>.*?</ide_opened_file>'
+    r'|<system-reminder>.*?</system-reminder>',
+    re.DOTALL,
+)
+
+
+def _clean_sub(m: re.Match) -> str:
+    return '[IDE Selection]' if m.group(1) else ''
+
+
+def _clean_text(text: str) -> str:
+    """Apply the tag cleanup and strip to a single message text."""
+    if '<' in text:
+        text = _CLEAN_RE.sub(_clean_sub, text)
+    return text.strip()
+
+
+def _iter_jsonl_batches(f) -> Iterator[list[bytes]]:
+    """Yield batches of complete lines from a binary stream, ~1 MiB each.
+
+    Keeps at most one chunk plus a partial trailing line buffered, so
+    memory stays bounded no matter how large the session file is. The
+    bytearray accumulator extends in amortized O(1), avoiding the
+    quadratic bytes-concatenation trap.
+    """
+    buf = bytearray()
+    while chunk := f.read(1 << 20):
+        buf += chunk
+        start = 0
+        batch = []
+        while (idx := buf.find(b'\n', start)) != -1:
+            batch.append(bytes(buf[start:idx]))
+            start = idx + 1
+        if start:
+            del buf[:start]
+        if batch:
+            yield batch
+    if buf:
+        yield [bytes(buf)]
+
+
+def _parse_jsonl_with_meta(filepath: Path) -> tuple[list[dict], str | None, str | None]:
+    """Parse a JSONL file, capturing (messages, sessionId, agentId) in one pass.
+
+    The session/agent ids come from the first message that carries a
+    sessionId, so no separate metadata scan over the messages is needed.
+    """
     messages = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
+    session_id = None
+    agent_id = None
+    # Stream the file in large chunks rather than reading it whole; a
+    # session file can be hundreds of megabytes and only one chunk of it
+    # needs to be resident at a time. The buffer matches the 1 MiB chunk
+    # size so each chunk comes off the kernel in one read.
+    line_num = 0
+    with open(filepath, 'rb', buffering=1 << 20) as f:
+        # Local bindings keep the per-line loop free of global/attribute
+        # lookups; this loop runs once per message across every file.
+        loads = _loads
+        append = messages.append
+        for batch in _iter_jsonl_batches(f):
+            kept = []
+            for line in batch:
+                line_num += 1
+                # No strip: the JSON parser tolerates surrounding
+                # whitespace, so only genuinely empty lines are skipped.
+                if not line or line == b'\r':
+                    continue
+                # Cheap byte prefilter: skip record types that downstream
+                # formatting drops anyway, without paying for json.loads.
+                # User tool-result messages are also dropped, except when
+                # they carry toolUseResult, which agent inlining needs.
+                if (b'"type":"queue-operation"' in line
+                        or b'"type":"file-history-snapshot"' in line):
+                    continue
+                if (b'"tool_result"' in line
+                        and b'"role":"user"' in line
+                        and b'"toolUseResult"' not in line):
+                    continue
+                kept.append((line_num, line))
+            if not kept:
                 continue
+
+            # One parser call per batch: wrapping the lines into a JSON
+            # array amortizes the parser's per-call setup cost.
             try:
-                messages.append(json.loads(line))
-            except json.JSONDecodeError as e:
-                print(f"Warning: Failed to parse line {line_num} in {filepath}: {e}", file=sys.stderr)
-    return messages
+                objs = loads(b'[%s]' % b','.join(l for _, l in kept))
+            except ValueError:
+                # A malformed line poisons its whole batch; reparse line
+                # by line to keep the good ones and warn precisely.
+                objs = []
+                for num, line in kept:
+                    try:
+                        objs.append(loads(line))
+                    except ValueError as e:
+                        print(f"Warning: Failed to parse line {num} in {filepath}: {e}", file=sys.stderr)
+
+            for msg in objs:
+                append(msg)
+                if session_id is None:
+                    sid = msg.get('sessionId')
+                    if sid:
+                        session_id = sid
+                        agent_id = msg.get('agentId')
+    return messages, session_id, agent_id
+
+
+def parse_jsonl(filepath: Path) -> list[dict]:
+    """Parse a JSONL file, returning list of message objects."""
+    return _parse_jsonl_with_meta(filepath)[0]
+
+
+_SESSION_ID_RE = re.compile(rb'"sessionId"\s*:\s*"([^"]*)"')
+
+
+def _sniff_session_id(filepath: Path) -> str | None:
+    """Read a file's sessionId from its head without parsing any JSON.
+
+    Every record in a session file carries the same sessionId, so a raw
+    byte scan over the first chunk is enough to identify the file.
+    Returns None when no sessionId appears in the head, in which case
+    the caller should fall back to a full parse.
+    """
+    with open(filepath, 'rb') as f:
+        head = f.read(1 << 16)
+    m = _SESSION_ID_RE.search(head)
+    return m.group(1).decode() if m else None
 
 
 def extract_session_info(filepath: Path) -> dict:
     """Extract session metadata from a JSONL file."""
-    messages = parse_jsonl(filepath)
-    if not messages:
+    messages, session_id, agent_id = _parse_jsonl_with_meta(filepath)
+    if not messages or not session_id:
         return None
 
-    # Find first message with relevant info
-    for msg in messages:
-        session_id = msg.get('sessionId')
-        agent_id = msg.get('agentId')
-        if session_id:
-            return {
-                'filepath': filepath,
-                'session_id': session_id,
-                'agent_id': agent_id,
-                'is_agent': agent_id is not None,
-                'messages': messages
-            }
-    return None
+    return {
+        'filepath': filepath,
+        'session_id': session_id,
+        'agent_id': agent_id,
+        'is_agent': agent_id is not None,
+        'messages': messages
+    }
+
+
+def _format_file_tool(tool_name: str, tool_input: dict) -> str:
+    return f"[{tool_name}] {tool_input.get('file_path', '')}"
+
+
+def _format_pattern_tool(tool_name: str, tool_input: dict) -> str:
+    return f"[{tool_name}] {tool_input.get('pattern', '')}"
+
+
+def _format_bash(tool_name: str, tool_input: dict) -> str:
+    return "[Bash]"
+
+
+def _format_task(tool_name: str, tool_input: dict) -> str:
+    desc = tool_input.get('description', '')
+    agent_type = tool_input.get('subagent_type', '')
+    prompt = tool_input.get('prompt', '')
+    if prompt:
+        prompt_lines = '\n'.join(f"  > {line}" for line in prompt.split('\n'))
+        return f"[Task] {desc} ({agent_type})\n{prompt_lines}"
+    return f"[Task] {desc} ({agent_type})"
+
+
+def _format_todo_write(tool_name: str, tool_input: dict) -> str:
+    todos = tool_input.get('todos', [])
+    if not todos:
+        return "[TodoWrite]"
+    lines = ["[TodoWrite]"]
+    for t in todos:
+        status = t.get('status', 'pending')
+        checkbox = "[x]" if status == 'completed' else "[ ]"
+        content = t.get('content', '')
+        lines.append(f"  - {checkbox} {content}")
+    return "\n".join(lines)
+
+
+def _format_web_fetch(tool_name: str, tool_input: dict) -> str:
+    url = tool_input.get('url', '')
+    prompt = tool_input.get('prompt', '')
+    if prompt:
+        prompt_lines = '\n'.join(f"  > {line}" for line in prompt.split('\n'))
+        return f"[WebFetch] {url}\n{prompt_lines}"
+    return f"[WebFetch] {url}"
+
+
+def _format_web_search(tool_name: str, tool_input: dict) -> str:
+    return f"[WebSearch] {tool_input.get('query', '')}"
+
+
+# O(1) dispatch instead of a chain of linear tuple-membership checks
+_TOOL_HANDLERS = {
+    'Read': _format_file_tool,
+    'Write': _format_file_tool,
+    'Edit': _format_file_tool,
+    'Glob': _format_pattern_tool,
+    'Grep': _format_pattern_tool,
+    'Bash': _format_bash,
+    'Task': _format_task,
+    'TodoWrite': _format_todo_write,
+    'WebFetch': _format_web_fetch,
+    'WebSearch': _format_web_search,
+}
 
 
 def _format_tool_call(tool_name: str, tool_input: dict) -> str:
     """Format a tool call for display."""
-    # Tools that show file_path
-    if tool_name in ('Read', 'Write', 'Edit'):
-        path = tool_input.get('file_path', '')
-        return f"[{tool_name}] {path}"
-
-    # Tools that show pattern
-    if tool_name in ('Glob', 'Grep'):
-        pattern = tool_input.get('pattern', '')
-        return f"[{tool_name}] {pattern}"
-
-    # Special cases
-    if tool_name == 'Bash':
-        return "[Bash]"
-
-    if tool_name == 'Task':
-        desc = tool_input.get('description', '')
-        agent_type = tool_input.get('subagent_type', '')
-        prompt = tool_input.get('prompt', '')
-        if prompt:
-            prompt_lines = '\n'.join(f"  > {line}" for line in prompt.split('\n'))
-            return f"[Task] {desc} ({agent_type})\n{prompt_lines}"
-        return f"[Task] {desc} ({agent_type})"
-
-    if tool_name == 'TodoWrite':
-        todos = tool_input.get('todos', [])
-        if not todos:
-            return "[TodoWrite]"
-        lines = ["[TodoWrite]"]
-        for t in todos:
-            status = t.get('status', 'pending')
-            checkbox = "[x]" if status == 'completed' else "[ ]"
-            content = t.get('content', '')
-            lines.append(f"  - {checkbox} {content}")
-        return "\n".join(lines)
-
-    if tool_name == 'WebFetch':
-        url = tool_input.get('url', '')
-        prompt = tool_input.get('prompt', '')
-        if prompt:
-            prompt_lines = '\n'.join(f"  > {line}" for line in prompt.split('\n'))
-            return f"[WebFetch] {url}\n{prompt_lines}"
-        return f"[WebFetch] {url}"
-
-    if tool_name == 'WebSearch':
-        query = tool_input.get('query', '')
-        return f"[WebSearch] {query}"
-
+    handler = _TOOL_HANDLERS.get(tool_name)
+    if handler is not None:
+        return handler(tool_name, tool_input)
     # Default: just the tool name
     return f"[{tool_name}]"
 
 
-def get_text_content(content_blocks: list) -> tuple[str, str, list[str]]:
+def get_text_content(content_blocks: list) -> tuple[str, str, list[str], bool]:
     """
     Extract text, thinking, and tool calls from content blocks.
-    Returns (text, thinking, tool_calls)
+    Returns (text, thinking, tool_calls, has_tool_result)
     """
     text_parts = []
     thinking_parts = []
     tool_calls = []
+    has_tool_result = False
 
     if not content_blocks:
-        return "", "", []
+        return "", "", [], False
+
+    # Fast path: the overwhelmingly common message shape is a single text
+    # block, which needs none of the loop machinery or joins below.
+    if len(content_blocks) == 1:
+        block = content_blocks[0]
+        if type(block) is dict and block.get('type') == 'text':
+            return block.get('text', ''), "", [], False
+
+    # Nearly every block is a dict; dispatch on .get('type') directly and
+    # treat the AttributeError as the rare bare-string case. Bound append
+    # methods avoid a LOAD_ATTR per block in this tight loop.
+    text_append = text_parts.append
+    thinking_append = thinking_parts.append
+    tools_append = tool_calls.append
 
     for block in content_blocks:
-        if isinstance(block, str):
-            text_parts.append(block)
-        elif isinstance(block, dict):
+        try:
             block_type = block.get('type', '')
+        except AttributeError:
+            if isinstance(block, str):
+                text_append(block)
+            continue
 
-            if block_type == 'text':
-                text_parts.append(block.get('text', ''))
-            elif block_type == 'thinking':
-                thinking_parts.append(block.get('thinking', ''))
-            elif block_type == 'tool_use':
-                tool_name = block.get('name', 'unknown')
-                tool_input = block.get('input', {})
-                tool_calls.append(_format_tool_call(tool_name, tool_input))
-            elif block_type == 'tool_result':
-                # Skip tool results in output
-                pass
+        if block_type == 'text':
+            text_append(block.get('text', ''))
+        elif block_type == 'thinking':
+            thinking_append(block.get('thinking', ''))
+        elif block_type == 'tool_use':
+            tool_name = block.get('name', 'unknown')
+            tool_input = block.get('input', {})
+            tools_append(_format_tool_call(tool_name, tool_input))
+        elif block_type == 'tool_result':
+            # Skipped in output, but callers want to know it was there
+            has_tool_result = True
 
-    return '\n'.join(text_parts), '\n'.join(thinking_parts), tool_calls
+    return '\n'.join(text_parts), '\n'.join(thinking_parts), tool_calls, has_tool_result
 
 
 def extract_message_parts(msg: dict) -> dict:
@@ -151,30 +310,21 @@ def extract_message_parts(msg: dict) -> dict:
     if isinstance(content, str):
         content = [{'type': 'text', 'text': content}]
 
-    text, thinking, tool_calls = get_text_content(content)
+    text, thinking, tool_calls, has_tool_result = get_text_content(content)
 
-    # Check if it's a tool result
-    if role == 'user':
-        is_tool_result = any(
-            isinstance(c, dict) and c.get('type') == 'tool_result'
-            for c in content
-        )
-        if is_tool_result:
-            return None
+    # Tool-result messages are dropped from the output
+    if role == 'user' and has_tool_result:
+        return None
 
     # Skip empty messages
     if not text and not thinking and not tool_calls:
         return None
 
-    model = message_data.get('model', '')
-    model_short = model.split('-')[1] if '-' in model else model
+    model_short = _short_model(message_data.get('model', ''))
 
     # Clean up text
     if text:
-        text = re.sub(r'<ide_selection>.*?</ide_selection>', '[IDE Selection]', text, flags=re.DOTALL)
-        text = re.sub(r'<ide_opened_file>.*?</ide_opened_file>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<system-reminder>.*?</system-reminder>', '', text, flags=re.DOTALL)
-        text = text.strip()
+        text = _clean_text(text)
 
     return {
         'role': role,
@@ -185,28 +335,55 @@ def extract_message_parts(msg: dict) -> dict:
     }
 
 
+@functools.lru_cache(maxsize=32)
+def _short_model(model: str) -> str:
+    """Shorten a model id like 'claude-sonnet-4-...' to its family name.
+
+    A conversation only ever mentions a handful of distinct model
+    strings, so the split is cached rather than recomputed per message.
+    """
+    return model.split('-', 2)[1] if '-' in model else model
+
+
+def _indent_block(w, text: str, prefix: str) -> None:
+    """Write a multi-line block with every line prefixed, plus a trailing blank line.
+
+    One C-level replace pass prefixes all lines at once instead of a
+    Python-level split + per-line write. Single-line payloads — the
+    common case for short messages — skip the replace scan entirely.
+    """
+    if prefix:
+        w(prefix)
+        if '\n' in text:
+            text = text.replace('\n', '\n' + prefix)
+    w(text)
+    w('\n\n')
+
+
 def format_merged_messages(messages: list[dict], indent: str = "") -> str:
     """
     Format messages, merging all consecutive assistant messages into a single block.
     """
-    lines = []
+    # Extract each message exactly once; the assistant-merging look-ahead
+    # below would otherwise re-extract the message it stopped on.
+    parts_list = [extract_message_parts(m) for m in messages]
+
+    buf = io.StringIO()
+    w = buf.write
+    n = len(parts_list)
     i = 0
 
-    while i < len(messages):
-        msg = messages[i]
-        parts = extract_message_parts(msg)
+    while i < n:
+        parts = parts_list[i]
 
         if parts is None:
             i += 1
             continue
 
         if parts['role'] == 'user':
-            lines.append(f"{indent}### User")
-            lines.append("")
+            w(f"{indent}### User\n\n")
             if parts['text']:
-                for line in parts['text'].split('\n'):
-                    lines.append(f"{indent}{line}")
-                lines.append("")
+                _indent_block(w, parts['text'], indent)
             i += 1
 
         elif parts['role'] == 'assistant':
@@ -214,8 +391,8 @@ def format_merged_messages(messages: list[dict], indent: str = "") -> str:
             assistant_parts_list = [parts]
             i += 1
 
-            while i < len(messages):
-                next_parts = extract_message_parts(messages[i])
+            while i < n:
+                next_parts = parts_list[i]
                 if next_parts is None:
                     i += 1
                     continue
@@ -231,8 +408,7 @@ def format_merged_messages(messages: list[dict], indent: str = "") -> str:
                     model = p['model']
 
             # Output header once
-            lines.append(f"{indent}### Assistant ({model})")
-            lines.append("")
+            w(f"{indent}### Assistant ({model})\n\n")
 
             # Build a flat list of content items: ('thinking', text), ('text', text), ('tools', [tools])
             # Then output, merging consecutive tool blocks
@@ -251,15 +427,11 @@ def format_merged_messages(messages: list[dict], indent: str = "") -> str:
                 item_type, item_content = content_items[j]
 
                 if item_type == 'thinking':
-                    for line in item_content.split('\n'):
-                        lines.append(f"{indent}> {line}")
-                    lines.append("")
+                    _indent_block(w, item_content, indent + '> ')
                     j += 1
 
                 elif item_type == 'text':
-                    for line in item_content.split('\n'):
-                        lines.append(f"{indent}{line}")
-                    lines.append("")
+                    _indent_block(w, item_content, indent)
                     j += 1
 
                 elif item_type == 'tools':
@@ -270,14 +442,30 @@ def format_merged_messages(messages: list[dict], indent: str = "") -> str:
                         all_tools.extend(content_items[j][1])
                         j += 1
                     for tc in all_tools:
-                        lines.append(f"{indent}- {tc}")
-                    lines.append("")
+                        w(indent)
+                        w("- ")
+                        w(tc)
+                        w("\n")
+                    w("\n")
                 else:
                     j += 1
         else:
             i += 1
 
-    return '\n'.join(lines)
+    return buf.getvalue()
+
+
+def _fmt_ts(ts: str) -> str:
+    """Reformat an ISO-8601 timestamp as 'YYYY-MM-DD HH:MM'."""
+    # Timestamps are virtually always '2024-01-02T03:04:05.678Z'; slicing
+    # beats the fromisoformat + strftime round-trip for that shape.
+    if len(ts) >= 16 and ts[10] == 'T':
+        return ts[:10] + ' ' + ts[11:16]
+    try:
+        dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+        return dt.strftime('%Y-%m-%d %H:%M')
+    except:
+        return ts[:16]
 
 
 def get_first_timestamp(messages: list[dict]) -> str:
@@ -285,41 +473,52 @@ def get_first_timestamp(messages: list[dict]) -> str:
     for msg in messages:
         ts = msg.get('timestamp', '')
         if ts:
-            try:
-                dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-                return dt.strftime('%Y-%m-%d %H:%M')
-            except:
-                return ts[:16]
+            return _fmt_ts(ts)
     return "unknown"
 
 
-def build_conversation_md(session_info: dict, agents: list[dict]) -> str:
-    """Build markdown for a conversation including its agents."""
-    lines = []
+def build_conversation_md(session_info: dict, agents: list[dict], write=None) -> str | None:
+    """Build markdown for a conversation including its agents.
+
+    If `write` is given (e.g. a file's bound write method), markdown is
+    emitted through it incrementally and None is returned. Otherwise the
+    whole document is built in memory and returned as a string.
+    """
+    if write is None:
+        buf = io.StringIO()
+        w = buf.write
+    else:
+        buf = None
+        w = write
 
     filepath = session_info['filepath']
     session_id = session_info['session_id']
 
-    # Get conversation start time
-    start_time = get_first_timestamp(session_info['messages'])
-
-    # Get working directory from messages
+    # Find the start time and working directory in one pass; both
+    # normally live in the first message or two, so this exits early.
+    start_time = None
     cwd = ""
     for msg in session_info['messages']:
-        if msg.get('cwd'):
-            cwd = msg['cwd']
+        if start_time is None:
+            ts = msg.get('timestamp')
+            if ts:
+                start_time = _fmt_ts(ts)
+        if not cwd:
+            c = msg.get('cwd')
+            if c:
+                cwd = c
+        if start_time is not None and cwd:
             break
+    if start_time is None:
+        start_time = "unknown"
 
-    lines.append(f"# Conversation: {filepath.stem}")
-    lines.append("")
-    lines.append(f"**Session ID:** `{session_id}`")
-    lines.append(f"**Started:** {start_time}")
-    if cwd:
-        lines.append(f"**Working Directory:** `{cwd}`")
-    lines.append(f"**Agents spawned:** {len(agents)}")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
+    w(
+        f"# Conversation: {filepath.stem}\n\n"
+        f"**Session ID:** `{session_id}`\n"
+        f"**Started:** {start_time}\n"
+        + (f"**Working Directory:** `{cwd}`\n" if cwd else "")
+        + f"**Agents spawned:** {len(agents)}\n\n---\n\n"
+    )
 
     # Build a map of agent messages by agentId
     agent_messages_by_id = {}
@@ -333,63 +532,70 @@ def build_conversation_md(session_info: dict, agents: list[dict]) -> str:
     # Process main session messages with agent inlining
     main_messages = session_info['messages']
 
-    # Collect messages into chunks, splitting at agent spawn points
-    chunk = []
-    for msg in main_messages:
-        chunk.append(msg)
-
-        # Check if this message spawns an agent
-        tool_result = msg.get('toolUseResult', {})
-        spawned_agent_id = (
-            tool_result.get('agentId')
-            if isinstance(tool_result, dict)
-            else None
-        )
-
-        if spawned_agent_id:
-            # Format the chunk up to and including the spawn message
-            formatted = format_merged_messages(chunk)
-            if formatted.strip():
-                lines.append(formatted)
-            chunk = []
-
-            # Inline the agent if available
-            if spawned_agent_id in agent_messages_by_id and spawned_agent_id not in inlined_agents:
-                inlined_agents.add(spawned_agent_id)
-
-                desc = tool_result.get('description', '')
-                lines.append("> ---")
-                lines.append(f"> **[Agent: {spawned_agent_id}]** {desc}")
-                lines.append(">")
-
-                agent_formatted = format_merged_messages(
-                    agent_messages_by_id[spawned_agent_id],
-                    indent="> "
+    # One pass to find agent-spawn messages, then format each slice
+    # between spawn points exactly once.
+    spawn_points = []
+    for idx, msg in enumerate(main_messages):
+        tool_result = msg.get('toolUseResult')
+        if isinstance(tool_result, dict):
+            spawned_agent_id = tool_result.get('agentId')
+            if spawned_agent_id:
+                spawn_points.append(
+                    (idx, spawned_agent_id, tool_result.get('description', ''))
                 )
-                if agent_formatted.strip():
-                    lines.append(agent_formatted)
 
-                lines.append(f"> **[Agent: {spawned_agent_id}]** ended")
-                lines.append("> ---")
-                lines.append("")
+    prev = 0
+    for idx, spawned_agent_id, desc in spawn_points:
+        # Format the slice up to and including the spawn message
+        formatted = format_merged_messages(main_messages[prev:idx + 1])
+        if formatted.strip():
+            w(formatted)
+        prev = idx + 1
+
+        # Inline the agent if available
+        if spawned_agent_id in agent_messages_by_id and spawned_agent_id not in inlined_agents:
+            inlined_agents.add(spawned_agent_id)
+
+            w(f"> ---\n> **[Agent: {spawned_agent_id}]** {desc}\n>\n")
+
+            agent_formatted = format_merged_messages(
+                agent_messages_by_id[spawned_agent_id],
+                indent="> "
+            )
+            if agent_formatted.strip():
+                w(agent_formatted)
+
+            w(f"> **[Agent: {spawned_agent_id}]** ended\n> ---\n\n")
 
     # Format any remaining messages after the last agent spawn
-    if chunk:
-        formatted = format_merged_messages(chunk)
+    if prev < len(main_messages):
+        formatted = format_merged_messages(main_messages[prev:])
         if formatted.strip():
-            lines.append(formatted)
+            w(formatted)
 
     # Add any agents that weren't inlined
     for agent in agents:
         agent_id = agent['agent_id']
         if agent_id not in inlined_agents:
-            lines.append(f"## Agent: {agent_id} (not inlined)")
-            lines.append("")
+            w(f"## Agent: {agent_id} (not inlined)\n\n")
             agent_formatted = format_merged_messages(agent['messages'], indent="> ")
             if agent_formatted.strip():
-                lines.append(agent_formatted)
+                w(agent_formatted)
+
+    return buf.getvalue() if buf is not None else None
+
+
+def _process_one(session_info: dict, agents: list[dict], output_dir: Path) -> tuple[str, int]:
+    """Render one conversation to markdown in output_dir (process-pool worker)."""
+    output_filename = f"{session_info['filepath'].stem}.md"
+    output_path = output_dir / output_filename
 
-    return '\n'.join(lines)
+    # Stream markdown straight to the file; 128 KiB buffer keeps
+    # syscall count low on large conversations.
+    with open(output_path, 'w', encoding='utf-8', buffering=1 << 17) as f:
+        build_conversation_md(session_info, agents, f.write)
+
+    return output_filename, len(agents)
 
 
 def main():
@@ -408,11 +614,33 @@ def main():
     sessions = {}  # session_id -> session_info
     agents_by_parent = defaultdict(list)  # parent_session_id -> [agent_info, ...]
 
-    for filepath in sorted(input_dir.glob('*.jsonl')):
-        if filepath.stat().st_size == 0:
-            continue
-
-        info = extract_session_info(filepath)
+    # os.scandir reuses the stat results cached from the directory read,
+    # so there's no extra stat syscall per file (glob + .stat() paid two).
+    with os.scandir(input_dir) as it:
+        entries = [e for e in it if e.name.endswith('.jsonl') and e.stat().st_size > 0]
+    entries.sort(key=lambda e: e.name)
+    filepaths = [Path(e.path) for e in entries]
+
+    # With --session, sniff each file's sessionId from its head so files
+    # belonging to other sessions (and their agents) never pay for a full
+    # parse. Files whose head yields no sessionId fall through to the
+    # normal parse rather than being dropped.
+    if args.session:
+        filepaths = [
+            fp for fp in filepaths
+            if (sid := _sniff_session_id(fp)) is None or args.session in sid
+        ]
+
+    # Parsing each file is independent CPU-bound work, so fan it out
+    # across processes; small batches stay sequential to skip the pool
+    # startup cost.
+    if len(filepaths) >= 4:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            infos = list(executor.map(extract_session_info, filepaths, chunksize=4))
+    else:
+        infos = [extract_session_info(filepath) for filepath in filepaths]
+
+    for info in infos:
         if not info:
             continue
 
@@ -425,27 +653,33 @@ def main():
 
     print(f"Found {len(sessions)} main sessions and {sum(len(v) for v in agents_by_parent.values())} agents")
 
-    # Process each main session
-    processed = 0
-    for session_id, session_info in sessions.items():
-        # Filter by session if specified
-        if args.session and args.session not in session_id:
-            continue
-
-        agents = agents_by_parent.get(session_id, [])
-
-        # Generate markdown
-        md_content = build_conversation_md(session_info, agents)
-
-        # Write to file
-        output_filename = f"{session_info['filepath'].stem}.md"
-        output_path = output_dir / output_filename
+    # Collect the sessions to process (applying the --session filter)
+    tasks = [
+        (session_info, agents_by_parent.get(session_id, []))
+        for session_id, session_info in sessions.items()
+        if not args.session or args.session in session_id
+    ]
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
-
-        processed += 1
-        print(f"Wrote: {output_path.name} ({len(agents)} agents)")
+    # Each conversation is independent, so fan the work out across CPUs.
+    # A single conversation isn't worth the pool startup cost.
+    processed = 0
+    if len(tasks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(
+                _process_one,
+                (t[0] for t in tasks),
+                (t[1] for t in tasks),
+                repeat(output_dir),
+                chunksize=4,
+            )
+            for output_filename, agent_count in results:
+                processed += 1
+                print(f"Wrote: {output_filename} ({agent_count} agents)")
+    else:
+        for session_info, agents in tasks:
+            output_filename, agent_count = _process_one(session_info, agents, output_dir)
+            processed += 1
+            print(f"Wrote: {output_filename} ({agent_count} agents)")
 
     print(f"\nProcessed {processed} conversations")
 
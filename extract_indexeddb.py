@@ -6,14 +6,21 @@ Extracts data from Chrome's IndexedDB storage (LevelDB format) to JSON.
 """
 
 import argparse
+import concurrent.futures
 import json
 import os
 import pathlib
 import shutil
 import sys
 import tempfile
+import threading
 from typing import Any, Iterator, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 try:
     from ccl_chromium_reader import ccl_chromium_indexeddb as idb
 except ImportError:
@@ -22,11 +29,38 @@ except ImportError:
     sys.exit(1)
 
 
+def _fast_copy(src: str, dst: str) -> None:
+    """copytree copy_function that clones file data in the kernel.
+
+    os.copy_file_range triggers copy-on-write reflinks on filesystems
+    that support them (btrfs, xfs) — effectively O(1) for the multi-GB
+    .ldb files — and still skips the userspace read/write loop
+    elsewhere. Falls back to shutil.copyfile when the syscall is
+    missing or the filesystem refuses it.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                src_fd = fsrc.fileno()
+                dst_fd = fdst.fileno()
+                remaining = os.fstat(src_fd).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+
 def copy_to_temp(source_path: pathlib.Path) -> pathlib.Path:
     """Copy a LevelDB directory to temp to avoid lock issues with running Chrome."""
     temp_dir = pathlib.Path(tempfile.mkdtemp(prefix="indexeddb_"))
     dest_path = temp_dir / source_path.name
-    shutil.copytree(source_path, dest_path)
+    shutil.copytree(source_path, dest_path, copy_function=_fast_copy)
     return dest_path
 
 
@@ -35,20 +69,26 @@ def get_chrome_profiles(chrome_path: pathlib.Path) -> Iterator[tuple[str, pathli
     if not chrome_path.exists():
         return
 
+    # One scandir pass instead of iterdir plus separate exists() probes;
+    # Path objects are only built for the profiles actually yielded.
+    names = []
+    with os.scandir(chrome_path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                names.append(entry.name)
+
     # Check for Default profile
-    default_profile = chrome_path / "Default"
-    if default_profile.exists():
-        yield ("Default", default_profile)
+    if "Default" in names:
+        yield ("Default", chrome_path / "Default")
 
     # Check for numbered profiles (Profile 1, Profile 2, etc.)
-    for profile_dir in chrome_path.iterdir():
-        if profile_dir.is_dir() and profile_dir.name.startswith("Profile "):
-            yield (profile_dir.name, profile_dir)
+    for name in names:
+        if name.startswith("Profile "):
+            yield (name, chrome_path / name)
 
     # Check for Guest Profile
-    guest_profile = chrome_path / "Guest Profile"
-    if guest_profile.exists():
-        yield ("Guest Profile", guest_profile)
+    if "Guest Profile" in names:
+        yield ("Guest Profile", chrome_path / "Guest Profile")
 
 
 def get_default_chrome_path() -> pathlib.Path:
@@ -61,35 +101,189 @@ def get_default_chrome_path() -> pathlib.Path:
         return pathlib.Path.home() / ".config/google-chrome"
 
 
+def _scan_for_leveldb(root: str, visited: list[str] | None = None) -> Iterator[str]:
+    """Recursively yield *.indexeddb.leveldb directory paths under root.
+
+    Uses os.scandir so directory-vs-file checks come from the directory
+    read itself instead of a stat call per entry (which rglob pays).
+    When visited is given, every directory the walk reads is appended
+    to it so callers can fingerprint exactly what the scan covered.
+    """
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    if visited is not None:
+        visited.append(root)
+    for entry in entries:
+        try:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+        except OSError:
+            continue
+        if entry.name.endswith(".indexeddb.leveldb"):
+            yield entry.path
+        else:
+            yield from _scan_for_leveldb(entry.path, visited)
+
+
+def _tree_cache_path() -> pathlib.Path:
+    return pathlib.Path.home() / ".cache" / "crdbextract" / "chrome_tree.json"
+
+
+def _stat_fingerprint(paths: list[str]) -> list[list]:
+    """Record (path, st_mtime_ns) for each directory.
+
+    Creating or deleting a subdirectory bumps its parent's mtime, so a
+    fingerprint over every directory a scan visited changes whenever
+    the set of origins changes anywhere in the scanned tree.
+    """
+    fingerprint = []
+    for path in paths:
+        try:
+            fingerprint.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            fingerprint.append([path, None])
+    return fingerprint
+
+
+def _fingerprint_fresh(fingerprint: list[list]) -> bool:
+    """Check that every fingerprinted directory still has its recorded mtime."""
+    for path, mtime_ns in fingerprint:
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
 def find_indexeddb_dirs(chrome_path: pathlib.Path) -> Iterator[pathlib.Path]:
-    """Find all IndexedDB LevelDB directories under the Chrome profile path."""
+    """Find all IndexedDB LevelDB directories under the Chrome profile path.
+
+    The full-tree walk is cached on disk keyed by the mtimes of every
+    directory the walk visited, so back-to-back invocations (a --list
+    followed by --all, say) revalidate with plain stats instead of
+    re-reading each directory, while an origin added or removed
+    anywhere in the tree still invalidates. Cached paths are
+    sanity-checked and any miss forces a fresh walk.
+    """
     if not chrome_path.exists():
         return
 
-    for idb_dir in chrome_path.rglob("*.indexeddb.leveldb"):
-        if idb_dir.is_dir():
-            yield idb_dir
+    root = str(chrome_path)
+    cache_path = _tree_cache_path()
 
+    try:
+        cached = json.loads(cache_path.read_bytes())
+        if cached.get("root") == root and _fingerprint_fresh(cached["fingerprint"]):
+            dirs = cached["dirs"]
+            if all(os.path.isdir(d) for d in dirs):
+                for idb_dir in dirs:
+                    yield pathlib.Path(idb_dir)
+                return
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    visited: list[str] = []
+    dirs = list(_scan_for_leveldb(root, visited))
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(
+            {"root": root, "fingerprint": _stat_fingerprint(visited), "dirs": dirs}
+        ))
+    except OSError:
+        pass
 
-def serialize_value(value: Any) -> Any:
-    """Convert a value to JSON-serializable format."""
+    for idb_dir in dirs:
+        yield pathlib.Path(idb_dir)
+
+
+def _serialize_scalar(value: Any) -> Any:
+    """Convert a leaf (non-container) value to JSON-serializable form."""
     if value is None:
         return None
     if isinstance(value, (str, int, float, bool)):
         return value
     if isinstance(value, bytes):
+        # ASCII is the overwhelmingly common case and isascii() is a
+        # cheap C scan, so skip the error-handling decode path for it.
+        if value.isascii():
+            return value.decode('ascii')
         try:
             return value.decode('utf-8')
         except UnicodeDecodeError:
             return f"<bytes:{len(value)}>"
-    if isinstance(value, dict):
-        return {str(k): serialize_value(v) for k, v in value.items()}
-    if isinstance(value, (list, tuple)):
-        return [serialize_value(v) for v in value]
     # For other types, convert to string
     return str(value)
 
 
+def serialize_value(value: Any) -> Any:
+    """Convert a value to JSON-serializable format.
+
+    Containers are walked with an explicit stack instead of recursion:
+    no per-call frame cost in the hot path and no recursion limit on
+    pathologically deep stored values. The `type(...) is` checks are the
+    fast path for the plain dict/list/tuple the deserializer produces,
+    with isinstance as the subclass fallback.
+    """
+    tv = type(value)
+    if tv is dict or isinstance(value, dict):
+        root = {}
+    elif tv is list or tv is tuple or isinstance(value, (list, tuple)):
+        root = [None] * len(value)
+    else:
+        return _serialize_scalar(value)
+
+    stack = [(value, root)]
+    while stack:
+        src, dst = stack.pop()
+        if isinstance(src, dict):
+            for k, v in src.items():
+                sk = str(k)
+                tv = type(v)
+                if tv is dict or isinstance(v, dict):
+                    child = {}
+                    stack.append((v, child))
+                elif tv is list or tv is tuple or isinstance(v, (list, tuple)):
+                    child = [None] * len(v)
+                    stack.append((v, child))
+                else:
+                    dst[sk] = _serialize_scalar(v)
+                    continue
+                dst[sk] = child
+        else:
+            for i, v in enumerate(src):
+                tv = type(v)
+                if tv is dict or isinstance(v, dict):
+                    child = {}
+                    stack.append((v, child))
+                elif tv is list or tv is tuple or isinstance(v, (list, tuple)):
+                    child = [None] * len(v)
+                    stack.append((v, child))
+                else:
+                    dst[i] = _serialize_scalar(v)
+                    continue
+                dst[i] = child
+    return root
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Fallback for types orjson can't serialize natively.
+
+    Mirrors what serialize_value does to leaves, so the output matches
+    the stdlib path: bytes become text (or a length placeholder),
+    tuples become lists, anything else becomes its str()."""
+    if isinstance(obj, bytes):
+        try:
+            return obj.decode('utf-8')
+        except UnicodeDecodeError:
+            return f"<bytes:{len(obj)}>"
+    if isinstance(obj, tuple):
+        return list(obj)
+    return str(obj)
+
+
 def extract_database(leveldb_path: pathlib.Path, include_deleted: bool = False, safe_copy: bool = False) -> dict:
     """Extract all data from an IndexedDB LevelDB directory.
 
@@ -139,20 +333,44 @@ def extract_database(leveldb_path: pathlib.Path, include_deleted: bool = False,
 
                 try:
                     store = wrapped_db.get_object_store_by_name(store_name)
+                    records_append = store_data["records"].append
                     for record in store.iterate_records():
+                        # hasattr is a hidden try/except per call; grab the
+                        # attributes directly and handle the miss once.
+                        try:
+                            state = record.state
+                        except AttributeError:
+                            state = None
+
                         # Skip deleted records unless requested
-                        if hasattr(record, 'state') and record.state == 'deleted' and not include_deleted:
+                        if state == 'deleted' and not include_deleted:
                             continue
 
-                        record_data = {
-                            "key": serialize_value(record.key.value if hasattr(record.key, 'value') else str(record.key)),
-                            "value": serialize_value(record.value)
-                        }
-
-                        if hasattr(record, 'state'):
-                            record_data["state"] = str(record.state)
-
-                        store_data["records"].append(record_data)
+                        key = record.key
+                        try:
+                            key = key.value
+                        except AttributeError:
+                            key = str(key)
+
+                        # With orjson available the raw values go straight
+                        # into the result; its C encoder walks the tree once
+                        # at dump time (_orjson_default covering the leaves)
+                        # instead of Python pre-walking every record here.
+                        if orjson is None:
+                            record_data = {
+                                "key": serialize_value(key),
+                                "value": serialize_value(record.value)
+                            }
+                        else:
+                            record_data = {
+                                "key": key,
+                                "value": record.value
+                            }
+
+                        if state is not None:
+                            record_data["state"] = str(state)
+
+                        records_append(record_data)
 
                 except Exception as e:
                     store_data["error"] = str(e)
@@ -194,6 +412,43 @@ def list_databases(chrome_path: pathlib.Path) -> None:
         print()
 
 
+def _dump_json(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize obj to JSON bytes with orjson when available."""
+    if orjson is not None:
+        # OPT_PASSTHROUGH_DATETIME sends datetimes (decoded JS Dates)
+        # through the default callback's str(), matching the stdlib
+        # path instead of orjson's native ISO-8601 form.
+        option = (orjson.OPT_NON_STR_KEYS
+                  | orjson.OPT_PASSTHROUGH_DATETIME
+                  | (orjson.OPT_INDENT_2 if pretty else 0))
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=option)
+        except TypeError:
+            # Exotic dict key types orjson can't handle even with
+            # OPT_NON_STR_KEYS: normalize the whole tree and retry.
+            return orjson.dumps(serialize_value(obj), option=option)
+    return json.dumps(obj, indent=2 if pretty else None, default=str).encode('utf-8')
+
+
+def _write_results(results: list[dict], out, pretty: bool) -> None:
+    """Write results to a binary stream as a JSON array.
+
+    Without --pretty each database is serialized and written separately,
+    so only one database's JSON is ever held in memory; pretty output
+    keeps the single-document dump for conventional formatting.
+    """
+    if pretty:
+        out.write(_dump_json(results, pretty=True))
+    else:
+        out.write(b"[")
+        for i, result in enumerate(results):
+            if i:
+                out.write(b",")
+            out.write(_dump_json(result))
+        out.write(b"]")
+    out.write(b"\n")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Extract data from Chrome IndexedDB storage",
@@ -268,8 +523,13 @@ Examples:
     if args.list_profiles:
         print(f"Chrome profiles in: {args.chrome_path}")
         for profile_name, profile_path in get_chrome_profiles(args.chrome_path):
-            idb_path = profile_path / "IndexedDB"
-            idb_count = len(list(idb_path.glob("*.indexeddb.leveldb"))) if idb_path.exists() else 0
+            # Count origins with a plain scandir suffix filter; glob would
+            # build (and stat) a Path per entry just to take the length.
+            try:
+                with os.scandir(os.path.join(profile_path, "IndexedDB")) as it:
+                    idb_count = sum(1 for e in it if e.name.endswith(".indexeddb.leveldb"))
+            except OSError:
+                idb_count = 0
             print(f"  {profile_name}: {idb_count} IndexedDB origins")
         return
 
@@ -291,25 +551,35 @@ Examples:
         result = extract_database(args.path, args.include_deleted, args.safe_copy)
         results = [result]
     elif args.all:
-        # Extract all databases
-        results = []
-        for idb_dir in find_indexeddb_dirs(effective_path):
-            print(f"Extracting: {idb_dir.name}", file=sys.stderr)
-            result = extract_database(idb_dir, args.include_deleted, args.safe_copy)
-            results.append(result)
+        # Extract all databases. Each leveldb is independent and the
+        # reader spends most of its time in I/O, so a small thread pool
+        # overlaps them; executor.map keeps results in scan order.
+        idb_dirs = list(find_indexeddb_dirs(effective_path))
+        print_lock = threading.Lock()
+
+        def extract_one(idb_dir: pathlib.Path) -> dict:
+            with print_lock:
+                print(f"Extracting: {idb_dir.name}", file=sys.stderr)
+            return extract_database(idb_dir, args.include_deleted, args.safe_copy)
+
+        if len(idb_dirs) > 1:
+            max_workers = min(8, os.cpu_count() or 1)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(extract_one, idb_dirs))
+        else:
+            results = [extract_one(idb_dir) for idb_dir in idb_dirs]
     else:
         parser.print_help()
         return
 
     # Output
-    indent = 2 if args.pretty else None
-    output = json.dumps(results, indent=indent, default=str)
-
     if args.output:
-        args.output.write_text(output)
+        with open(args.output, "wb") as out:
+            _write_results(results, out, args.pretty)
         print(f"Wrote {len(results)} database(s) to {args.output}", file=sys.stderr)
     else:
-        print(output)
+        _write_results(results, sys.stdout.buffer, args.pretty)
+        sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":